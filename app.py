@@ -1,16 +1,15 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from datetime import datetime
-import requests
-from io import StringIO
-import re
+
+from data_loader import load_data, load_aggregates
 
 # ==========================================================
 # CONFIG
 # ==========================================================
-GOOGLE_SHEET_CSV = "https://docs.google.com/spreadsheets/d/e/2PACX-1vSf8Mw53Loetlm4LAdRkMFhvr7JQrlTwIxa_KbYENc-nZa3AYSO4nk9DSevduzQ3DCvhhLH9xryBwfu/pub?gid=13772104&single=true&output=csv"
-USD_RATE = 1454
 HEADER_BLUE = "#0D47A1"
 LIGHT_BLUE = "#E8F1FF"
 
@@ -23,7 +22,7 @@ st.markdown(f"""
 <style>
 .block-container {{ padding-top: 1.5rem !important; }}
 
-.stTabs {{
+.stRadio {{
     position: sticky;
     top: 0;
     background: #FAFAFA;
@@ -42,9 +41,9 @@ st.markdown(f"""
 .kpi-title {{ font-size:13px;color:#37474F;font-weight:600; }}
 .kpi-value {{ font-size:22px;font-weight:700;color:{HEADER_BLUE}; }}
 
-.stTabs [data-baseweb="tab-list"] {{ gap:0px !important; }}
+.stRadio [role="radiogroup"] {{ gap:0px !important; }}
 
-.stTabs [data-baseweb="tab"] {{
+.stRadio [role="radiogroup"] label {{
  background:{LIGHT_BLUE};
  padding:8px 14px;
  margin:0 !important;
@@ -53,22 +52,34 @@ st.markdown(f"""
  font-weight:600;
 }}
 
-.stTabs [data-baseweb="tab"]:not(:first-child) {{
+.stRadio [role="radiogroup"] label:not(:first-child) {{
  margin-left:-1px !important;
 }}
 
-.stTabs [aria-selected="true"] {{
+.stRadio [role="radiogroup"] label:has(input:checked) {{
  background:{HEADER_BLUE};
- color:white;
  border:1px solid {HEADER_BLUE};
  z-index:2;
 }}
+
+.stRadio [role="radiogroup"] label:has(input:checked) p {{
+ color:white;
+}}
+
+/* the pills carry the selection state, so hide the radio dots */
+.stRadio [role="radiogroup"] label > div:first-child {{
+ display:none;
+}}
 </style>
 """, unsafe_allow_html=True)
 
 # ==========================================================
 # CHART STABILITY HELPER
 # ==========================================================
+# skipping the modebar saves the frontend from building its DOM and
+# event handlers for every chart
+PLOTLY_CONFIG = {"displayModeBar": False}
+
 def stabilize_chart(fig):
     fig.update_layout(
         autosize=False,
@@ -80,45 +91,6 @@ def stabilize_chart(fig):
     )
     return fig
 
-# ==========================================================
-# LOAD DATA
-# ==========================================================
-@st.cache_data(ttl=30)
-def load_data():
-    r = requests.get(GOOGLE_SHEET_CSV)
-    r.raise_for_status()
-    df_raw = pd.read_csv(StringIO(r.text))
-
-    df = df_raw[
-        ["Equipment name","Department","Service","QTY Requested",
-         "Unit Price RWF","Has Contract?","Delivery Status",
-         "Phase I","Phase II"]
-    ].copy()
-
-    df.columns = [
-        "Equipment","Department","Service","Quantity",
-        "Unit_Price_RWF","Has Contract?","Delivery Status",
-        "Phase I","Phase II"
-    ]
-
-    for col in ["Equipment","Department","Service"]:
-        df[col] = df[col].astype(str).str.strip()
-        df.loc[df[col].isin(["","nan","None"]),col] = "Unknown"
-
-    def clean_numeric(col):
-        col = col.astype(str).str.replace(",","").str.replace(" ","")
-        col = col.replace({"NA":"0","-":"0","":"0","nan":"0","None":"0"})
-        col = col.apply(lambda x: re.sub(r"[^\d.]","",x))
-        return pd.to_numeric(col,errors="coerce").fillna(0)
-
-    df["Quantity"] = clean_numeric(df["Quantity"])
-    df["Unit_Price_RWF"] = clean_numeric(df["Unit_Price_RWF"])
-
-    df["Unit_Price"] = df["Unit_Price_RWF"] / USD_RATE
-    df["Total_Price"] = df["Unit_Price"] * df["Quantity"]
-
-    return df
-
 df = load_data()
 
 # ==========================================================
@@ -133,46 +105,57 @@ st.caption(
     f"**Last updated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 )
 
-# ==========================================================
-# WRAP TEXT
-# ==========================================================
-def wrap_text(text,width=30):
-    words,lines,line=text.split(),[], ""
-    for w in words:
-        if len(line)+len(w)<=width:
-            line+=(" " if line else "")+w
-        else:
-            lines.append(line)
-            line=w
-    lines.append(line)
-    return "<br>".join(lines[:2])
-
-df["Equipment_wrapped"]=df["Equipment"].apply(wrap_text)
-
 # ==========================================================
 # KPI CARDS
 # ==========================================================
-k1,k2,k3,k4,k5=st.columns(5)
-
-k1.markdown(f"<div class='kpi-card'><div class='kpi-title'>Total Budget</div><div class='kpi-value'>${int(df['Total_Price'].sum()):,}</div></div>",unsafe_allow_html=True)
-k2.markdown(f"<div class='kpi-card'><div class='kpi-title'>Total Quantity</div><div class='kpi-value'>{int(df['Quantity'].sum()):,}</div></div>",unsafe_allow_html=True)
-k3.markdown(f"<div class='kpi-card'><div class='kpi-title'>Departments</div><div class='kpi-value'>{df['Department'].nunique()}</div></div>",unsafe_allow_html=True)
-k4.markdown(f"<div class='kpi-card'><div class='kpi-title'>Services</div><div class='kpi-value'>{df['Service'].nunique()}</div></div>",unsafe_allow_html=True)
-k5.markdown(f"<div class='kpi-card'><div class='kpi-title'>Equipment Items</div><div class='kpi-value'>{df['Equipment'].nunique()}</div></div>",unsafe_allow_html=True)
+# cached scalars: one float64 pass for both sums, and the category
+# counts come straight from the (already deduplicated) category indexes
+@st.cache_data(show_spinner=False)
+def compute_kpis(df):
+    totals=df[["Total_Price","Quantity"]].astype("float64").sum()
+    return {
+        "total_budget":int(totals["Total_Price"]),
+        "total_qty":int(totals["Quantity"]),
+        "departments":len(df["Department"].cat.categories),
+        "services":len(df["Service"].cat.categories),
+        "equipment":df["Equipment"].nunique(),
+    }
+
+kpis=compute_kpis(df)
+
+def kpi_card(title,value):
+    return f"<div class='kpi-card'><div class='kpi-title'>{title}</div><div class='kpi-value'>{value}</div></div>"
+
+# one element (and one frontend message) for all five cards instead of
+# five st.columns markdown round-trips
+st.markdown(
+    "<div style='display:grid;grid-template-columns:repeat(5,1fr);gap:14px'>"
+    +kpi_card("Total Budget",f"${kpis['total_budget']:,}")
+    +kpi_card("Total Quantity",f"{kpis['total_qty']:,}")
+    +kpi_card("Departments",kpis["departments"])
+    +kpi_card("Services",kpis["services"])
+    +kpi_card("Equipment Items",kpis["equipment"])
+    +"</div>",
+    unsafe_allow_html=True
+)
 
 # ==========================================================
 # PIE CHART (FIXED OVERLAP ISSUE)
 # ==========================================================
 def pie_chart(df_in, column, title):
-    pie_df = df_in[column].fillna("Unknown").value_counts().reset_index()
-    pie_df.columns = [column, "Count"]
-
-    fig = px.pie(
-        pie_df,
-        names=column,
-        values="Count",
+    # the loader already filled NA and categorized this column, so
+    # value_counts is a code bincount; drop categories a subset filtered
+    # away entirely so they don't linger as empty slices
+    counts = df_in[column].value_counts()
+    counts = counts[counts > 0]
+
+    # go.Pie directly: px.pie's input inspection and frame handling are
+    # pure overhead for a plain label/value pair
+    fig = go.Figure(go.Pie(
+        labels=counts.index.tolist(),
+        values=counts.to_numpy(),
         hole=0.45
-    )
+    ))
 
     fig.update_traces(
         textinfo="percent+label",
@@ -213,34 +196,67 @@ def pie_contract_subset(df_in, subset_col, title):
 
     return pie_chart(filtered, "Has Contract?", title)
 
+# same memoization as the bar charts: cache the JSON-ready spec dict,
+# keyed on the subset frame and title
+@st.cache_data(show_spinner=False)
+def pie_chart_cached(df_in, column, title):
+    return pie_chart(df_in, column, title).to_dict()
+
+@st.cache_data(show_spinner=False)
+def pie_contract_subset_cached(df_in, subset_col, title):
+    return pie_contract_subset(df_in, subset_col, title).to_dict()
+
 # ==========================================================
 # BAR CHART
 # ==========================================================
-def top10(df_in,metric):
-    if metric=="Unit_Price":
-        df_unique=df_in.drop_duplicates("Equipment_wrapped")
-        return df_unique.groupby("Equipment_wrapped",as_index=False)[metric].max().sort_values(metric,ascending=False).head(10)
-
-    return df_in.groupby("Equipment_wrapped",as_index=False)[metric].sum().sort_values(metric,ascending=False).head(10)
-
-
-def bar_chart(df_in,title,y_col,y_label,is_currency=False):
-
-    fig=px.bar(
-        df_in,
-        x="Equipment_wrapped",
-        y=y_col,
-        color="Equipment_wrapped",
-        color_discrete_sequence=px.colors.qualitative.Set3,
-        text=df_in[y_col].apply(lambda x:f"${int(x):,}" if is_currency else f"{int(x):,}")
-    )
-
-    fig.update_traces(
+METRICS=("Unit_Price","Total_Price","Quantity")
+
+def _select_top(uniques,agg):
+    # partial selection of the 10 largest, then sort only those; the
+    # (labels, values) pair feeds go.Bar directly, so there's no point
+    # wrapping it back into a frame just to slice it apart again.
+    # tuples, not ndarrays: st.cache_data hashes object arrays by their
+    # pointer bytes, which would miss the figure cache on every rerun
+    if len(agg)>10:
+        keep=np.argpartition(-agg,10)[:10]
+    else:
+        keep=np.arange(len(agg))
+    order=keep[np.argsort(-agg[keep])]
+    return tuple(str(u) for u in np.asarray(uniques)[order]),tuple(agg[order].tolist())
+
+
+def top_all(df_in):
+    # factorize once and run all three aggregation kernels over the same
+    # codes: bincount for the sums, maximum.at for the unit price (max is
+    # idempotent over duplicates, so no drop_duplicates pre-pass)
+    codes,uniques=pd.factorize(df_in["Equipment_wrapped"],sort=False)
+    unit=np.full(len(uniques),-np.inf)
+    np.maximum.at(unit,codes,df_in["Unit_Price"].to_numpy(dtype="float64"))
+    total=np.bincount(codes,weights=df_in["Total_Price"].to_numpy(dtype="float64"),minlength=len(uniques))
+    qty=np.bincount(codes,weights=df_in["Quantity"].to_numpy(dtype="float64"),minlength=len(uniques))
+
+    aggs={"Unit_Price":unit,"Total_Price":total,"Quantity":qty}
+    return {metric:_select_top(uniques,aggs[metric]) for metric in METRICS}
+
+
+def bar_chart(labels,values,title,y_label,is_currency=False):
+
+    # one go.Bar trace with a per-bar color array instead of px.bar's
+    # one-trace-per-color expansion (10x fewer traces and DOM nodes)
+    colors=px.colors.qualitative.Set3
+    vals=np.asarray(values,dtype="int64")
+    prefix="$" if is_currency else ""
+    fig=go.Figure(go.Bar(
+        x=labels,
+        y=values,
+        marker=dict(
+            color=[colors[i%len(colors)] for i in range(len(labels))],
+            line=dict(width=1.8,color="black")
+        ),
+        text=[f"{prefix}{v:,}" for v in vals],
         textposition="outside",
-        marker_line_width=1.8,
-        marker_line_color="black",
         textfont=dict(color="black")
-    )
+    ))
 
     fig.update_layout(
         showlegend=False,
@@ -249,7 +265,8 @@ def bar_chart(df_in,title,y_col,y_label,is_currency=False):
         height=650,
         margin=dict(t=140,b=200),
         xaxis_title="Equipment",
-        yaxis_title=y_label
+        yaxis_title=y_label,
+        uirevision="static"
     )
 
     fig.update_xaxes(showline=True,linewidth=2,linecolor="black",tickangle=-45)
@@ -281,64 +298,108 @@ def bar_chart(df_in,title,y_col,y_label,is_currency=False):
 
     return fig
 
+# figures are pure functions of two 10-element tuples + title, so
+# memoize them and skip the Plotly figure assembly on reruns; the cache
+# stores the plain JSON-serializable dict, which is far cheaper to
+# pickle than a Figure object and is accepted by st.plotly_chart as-is
+@st.cache_data(show_spinner=False)
+def bar_chart_cached(labels,values,title,y_label,is_currency=False):
+    return bar_chart(labels,values,title,y_label,is_currency).to_dict()
+
+# ==========================================================
+# TOP-10 TABLES (precomputed once per data refresh)
+# ==========================================================
+@st.cache_data(show_spinner=False)
+def precompute_top10(agg):
+    # keys are (department, service, metric); None means "all"; each
+    # value is a (labels, values) tuple pair ready for bar_chart.
+    # agg already holds one row per (dept, service, equipment), so each
+    # scope is a cheap re-aggregation of a small frame.
+    tables={}
+    for metric,table in top_all(agg).items():
+        tables[(None,None,metric)]=table
+    for dept,dept_agg in agg.groupby("Department",sort=False,observed=True):
+        for metric,table in top_all(dept_agg).items():
+            tables[(dept,None,metric)]=table
+        for svc,svc_agg in dept_agg.groupby("Service",sort=False,observed=True):
+            for metric,table in top_all(svc_agg).items():
+                tables[(dept,svc,metric)]=table
+    return tables
+
+top10_tables=precompute_top10(load_aggregates())
+
 # ==========================================================
 # DOWNLOAD
 # ==========================================================
-st.download_button("⬇️ Download Full Data (CSV)",df.to_csv(index=False),"procurement_data.csv")
+# serialize once per data refresh, not on every rerun
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    return df.to_csv(index=False).encode("utf-8")
+
+st.download_button("⬇️ Download Full Data (CSV)",to_csv_bytes(df),"procurement_data.csv")
+
+# partition the frame once per data refresh; switching departments is
+# then a dict lookup instead of a full-frame boolean scan per rerun
+@st.cache_data(show_spinner=False)
+def by_dept(df):
+    return {k:v for k,v in df.groupby("Department",sort=False,observed=True)}
 
 # ==========================================================
-# TABS
+# SECTION PICKER
 # ==========================================================
-department_list=sorted(df["Department"].unique())
-tabs=st.tabs(["Overview"]+department_list)
+# st.tabs executes every tab body on each rerun, so all departments'
+# charts were built even though only one is visible; a radio renders
+# exactly one section per rerun
+# the category index is already sorted and deduplicated
+department_list=list(df["Department"].cat.categories)
+section=st.radio("Section",["Overview"]+department_list,horizontal=True,
+                 label_visibility="collapsed")
 
 # ==========================================================
 # OVERVIEW
 # ==========================================================
-with tabs[0]:
+if section=="Overview":
 
     c1,c2,c3=st.columns(3)
 
-    c1.plotly_chart(pie_chart(df,"Has Contract?","Contract Coverage"),use_container_width=True)
-    c2.plotly_chart(pie_contract_subset(df,"Phase I","Phase I – Contract Coverage"),use_container_width=True)
-    c3.plotly_chart(pie_contract_subset(df,"Phase II","Phase II – Contract Coverage"),use_container_width=True)
+    c1.plotly_chart(pie_chart_cached(df,"Has Contract?","Contract Coverage"),use_container_width=True,config=PLOTLY_CONFIG)
+    c2.plotly_chart(pie_contract_subset_cached(df,"Phase I","Phase I – Contract Coverage"),use_container_width=True,config=PLOTLY_CONFIG)
+    c3.plotly_chart(pie_contract_subset_cached(df,"Phase II","Phase II – Contract Coverage"),use_container_width=True,config=PLOTLY_CONFIG)
 
-    st.plotly_chart(bar_chart(top10(df,"Unit_Price"),"Top 10 Equipment by Unit Price (USD)","Unit_Price","USD",True),use_container_width=True)
-    st.plotly_chart(bar_chart(top10(df,"Total_Price"),"Top 10 Equipment by Total Price (USD)","Total_Price","USD",True),use_container_width=True)
-    st.plotly_chart(bar_chart(top10(df,"Quantity"),"Top 10 Equipment by Quantity","Quantity","Quantity"),use_container_width=True)
+    st.plotly_chart(bar_chart_cached(*top10_tables[(None,None,"Unit_Price")],"Top 10 Equipment by Unit Price (USD)","USD",True),use_container_width=True,config=PLOTLY_CONFIG)
+    st.plotly_chart(bar_chart_cached(*top10_tables[(None,None,"Total_Price")],"Top 10 Equipment by Total Price (USD)","USD",True),use_container_width=True,config=PLOTLY_CONFIG)
+    st.plotly_chart(bar_chart_cached(*top10_tables[(None,None,"Quantity")],"Top 10 Equipment by Quantity","Quantity"),use_container_width=True,config=PLOTLY_CONFIG)
 
 # ==========================================================
-# DEPARTMENT TABS
+# DEPARTMENT VIEW
 # ==========================================================
-for i,dept in enumerate(department_list,start=1):
-
-    with tabs[i]:
-
-        dept_df=df[df["Department"]==dept]
-        services=sorted(dept_df["Service"].unique())
+else:
+
+    dept=section
+    dept_df=by_dept(df)[dept]
+    # one hash-partition instead of a full-frame scan per service
+    svc_groups={s:g for s,g in dept_df.groupby("Service",sort=False,observed=True)}
+    services=sorted(svc_groups)
+
+    # only the selected service is rendered, instead of eagerly
+    # building charts for every service tab on each rerun
+    if len(services)>1:
+        choice=st.radio("Service",["All Services"]+services,horizontal=True,
+                        key=f"svc_{dept}",label_visibility="collapsed")
+    else:
+        choice="All Services"
+
+    if choice=="All Services":
+        d,svc,title_suffix=dept_df,None,dept
+    else:
+        d,svc,title_suffix=svc_groups[choice],choice,f"{dept} – {choice}"
 
-        if len(services)>1:
-            service_tabs=st.tabs(["All Services"]+services)
-        else:
-            service_tabs=[st.container()]
-
-        for j,svc_tab in enumerate(service_tabs):
-
-            with svc_tab:
-
-                if len(services)>1 and j>0:
-                    d=dept_df[dept_df["Service"]==services[j-1]]
-                    title_suffix=f"{dept} – {services[j-1]}"
-                else:
-                    d=dept_df
-                    title_suffix=dept
-
-                c1,c2,c3=st.columns(3)
+    c1,c2,c3=st.columns(3)
 
-                c1.plotly_chart(pie_chart(d,"Has Contract?",f"Contract Coverage – {title_suffix}"),use_container_width=True)
-                c2.plotly_chart(pie_contract_subset(d,"Phase I",f"Phase I – {title_suffix}"),use_container_width=True)
-                c3.plotly_chart(pie_contract_subset(d,"Phase II",f"Phase II – {title_suffix}"),use_container_width=True)
+    c1.plotly_chart(pie_chart_cached(d,"Has Contract?",f"Contract Coverage – {title_suffix}"),use_container_width=True,config=PLOTLY_CONFIG)
+    c2.plotly_chart(pie_contract_subset_cached(d,"Phase I",f"Phase I – {title_suffix}"),use_container_width=True,config=PLOTLY_CONFIG)
+    c3.plotly_chart(pie_contract_subset_cached(d,"Phase II",f"Phase II – {title_suffix}"),use_container_width=True,config=PLOTLY_CONFIG)
 
-                st.plotly_chart(bar_chart(top10(d,"Unit_Price"),f"Top 10 Unit Price – {title_suffix}","Unit_Price","USD",True),use_container_width=True)
-                st.plotly_chart(bar_chart(top10(d,"Total_Price"),f"Top 10 Total Price – {title_suffix}","Total_Price","USD",True),use_container_width=True)
-                st.plotly_chart(bar_chart(top10(d,"Quantity"),f"Top 10 Quantity – {title_suffix}","Quantity","Quantity"),use_container_width=True)
+    st.plotly_chart(bar_chart_cached(*top10_tables[(dept,svc,"Unit_Price")],f"Top 10 Unit Price – {title_suffix}","USD",True),use_container_width=True,config=PLOTLY_CONFIG)
+    st.plotly_chart(bar_chart_cached(*top10_tables[(dept,svc,"Total_Price")],f"Top 10 Total Price – {title_suffix}","USD",True),use_container_width=True,config=PLOTLY_CONFIG)
+    st.plotly_chart(bar_chart_cached(*top10_tables[(dept,svc,"Quantity")],f"Top 10 Quantity – {title_suffix}","Quantity"),use_container_width=True,config=PLOTLY_CONFIG)